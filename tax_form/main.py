@@ -2,227 +2,705 @@
 
 import argparse
 import logging
+import math
+import os
 import re
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import (
+    Any,
+    DefaultDict,
+    Dict,
+    Iterator,
+    List,
+    Match,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 import pdfplumber
+from pdfminer.pdftypes import resolve1
+from pdfminer.psparser import LIT
+
+try:
+    import pypdf
+except ImportError:  # Optional, faster text-only extraction backend
+    pypdf = None  # type: ignore[assignment]
 
 # Configure logging
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger(__name__)
 
+# Pattern to match (from the start of a line, after any indentation) lines like:
+# Jan-16-2024 Jun-01-2020 3.0000 $549.75 $1,175.99 + $626.24 USD DO
+# Columns are separated by any whitespace except a newline, so a match never
+# spans lines.
+_TXN_RE = re.compile(
+    r"^[^\S\n]*(\w{3}-\d{2}-\d{4})[^\S\n]+(\w{3}-\d{2}-\d{4})[^\S\n]+"
+    r"([\d.]+)[^\S\n]+\$[\d,.]+",
+    re.MULTILINE,
+)
+
+# Literal that every transaction line contains, used to reject text cheaply
+_TXN_LITERAL = "$"
+
+# Section markers and header tokens of the salary certificate
+_VESTED_SECTION = "Vested Stocks"
+_VESTED_YEAR = "2024"
+_VESTED_HEADER_TOKENS = ("Award", "Date")
+_VESTED_SUBHEADER = "Date Date Price"
+_ESPP_MARKER = "ESPP"
+_ESPP_SECTION = "ESPP (Employee Stock Purchase Plan)"
+_ESPP_END_MARKERS = ("Total amount", "Page")
+_ESPP_HEADER_TOKENS = ("Off Period", "Purchased")
+_ESPP_SUBHEADER = "Shares Price"
+_ESPP_SUMMARY_PREFIX = "CHF"
+
+# Vested stocks data rows:
+# Award_Date Award_ID Vest_Date Award_Price Market_Value Shares ...
+_VEST_ROW_RE = re.compile(
+    r"\s*\S+\s+\S+\s+(\d{2}\.\d{2}\.\d{4})\s+\S+\s+\S+\s+([\d.,']+)(?!\S)"
+)
+
+# ESPP data rows: Off_Period Purchased_Shares FMV_Price Purchase_Price ...
+# The off period must be alphanumeric; unless it is all digits, the purchased
+# shares must also be numeric (digits and dots only)
+_ESPP_ROW_RE = re.compile(
+    r"\s*(?P<period>(?P<digits>\d+)|[^\W_]+)\s+"
+    r"(?P<shares>(?(digits)\S+|[\d.]*\d[\d.]*))(?!\S)"
+)
+
+# Characters removed before checking whether a line is just a total
+_TOTAL_LINE_TBL = str.maketrans("", "", ".' ")
+
+# Parsed dates keyed by their raw string; the same dates repeat a lot per document
+_SOLD_DATE_CACHE: Dict[str, datetime] = {}
+_VEST_DATE_CACHE: Dict[str, datetime] = {}
+
+# Thousands separators (1,000 or 1'000) stripped from share counts
+_THOUSANDS_TBL = str.maketrans("", "", ",'")
+
+# Parsed share counts keyed by their raw string
+_NUMBER_CACHE: Dict[str, float] = {}
+
+# Month abbreviations used in 'MMM-DD-YYYY' dates, matched case-insensitively
+_MONTHS = {
+    name: number
+    for number, name in enumerate(
+        "jan feb mar apr may jun jul aug sep oct nov dec".split(), 1
+    )
+}
+
+# Minimum page count, per backend, before text extraction is spread over
+# worker processes; pypdf pages are so cheap that a pool only pays off on long
+# documents
+_PARALLEL_MIN_PAGES = {"pdfplumber": 4, "pypdf": 32}
+
+# Below this many transactions the plain Python aggregation loop is faster
+_VECTORIZE_MIN_ROWS = 64
+
+# Subtype of XObjects that may draw text, unlike image XObjects
+_FORM_SUBTYPE = LIT("Form")
+
+# Text extraction backends; pypdf is an opt-in, faster text-only alternative
+PDF_BACKENDS = ("pdfplumber", "pypdf")
+DEFAULT_PDF_BACKEND = "pdfplumber"
+
+
+def _parse_number(value: str) -> float:
+    """
+    Parse a share count that may contain thousands separators, caching the result.
+
+    Args:
+        value: Number string such as "1,024.750" or "1'024.750"
+
+    Returns:
+        Parsed float value
+
+    Raises:
+        ValueError: If the string is not a valid number
+    """
+    number = _NUMBER_CACHE.get(value)
+    if number is None:
+        number = float(value.translate(_THOUSANDS_TBL))
+        _NUMBER_CACHE[value] = number
+    return number
+
+
+def _parse_sold_date(date_str: str) -> datetime:
+    """
+    Parse a date string in format 'MMM-DD-YYYY', caching the result.
+
+    Args:
+        date_str: Date string such as 'Jan-16-2024'
+
+    Returns:
+        Parsed datetime object
+
+    Raises:
+        ValueError: If the string does not match the expected format
+    """
+    dt = _SOLD_DATE_CACHE.get(date_str)
+    if dt is None:
+        # The format is fixed, so split it by hand instead of using strptime
+        month, day, year = date_str.split("-")
+        try:
+            month_number = _MONTHS[month.lower()]
+        except KeyError:
+            raise ValueError(f"Unknown month abbreviation: {month}") from None
+        dt = datetime(int(year), month_number, int(day))
+        _SOLD_DATE_CACHE[date_str] = dt
+    return dt
+
+
+def _parse_vest_date(date_str: str) -> datetime:
+    """
+    Parse a date string in format 'DD.MM.YYYY', caching the result.
+
+    Args:
+        date_str: Date string such as '29.02.2024'
+
+    Returns:
+        Parsed datetime object
+
+    Raises:
+        ValueError: If the string does not match the expected format
+    """
+    dt = _VEST_DATE_CACHE.get(date_str)
+    if dt is None:
+        day, month, year = date_str.split(".")
+        dt = datetime(int(year), int(month), int(day))
+        _VEST_DATE_CACHE[date_str] = dt
+    return dt
+
+
+def _check_pdf_backend(backend: str) -> None:
+    """
+    Check that a text extraction backend is known and available.
+
+    Args:
+        backend: One of PDF_BACKENDS
+
+    Raises:
+        ValueError: If the backend is unknown or pypdf is requested but missing
+    """
+    if backend not in PDF_BACKENDS:
+        raise ValueError(f"Unknown PDF backend: {backend}")
+
+    if backend == "pypdf" and pypdf is None:
+        raise ValueError("The pypdf backend requires the 'pypdf' package")
+
+
+def _available_cpus() -> int:
+    """Return the number of CPUs this process may run on."""
+    # sched_getaffinity honours CPU affinity and container limits, where available
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+@contextmanager
+def _open_pdf_pages(pdf_path: str, backend: str) -> Iterator[Sequence[Any]]:
+    """Open a PDF file with the given backend and yield its pages."""
+    if backend == "pypdf":
+        yield pypdf.PdfReader(pdf_path).pages
+        return
+
+    with pdfplumber.open(pdf_path) as pdf:
+        yield pdf.pages
+
+
+def _page_content(page: Any, backend: str) -> bytes:
+    """
+    Return the decoded content stream of a PDF page.
+
+    Args:
+        page: pypdf or pdfplumber page object
+        backend: Either "pypdf" or "pdfplumber"
+
+    Returns:
+        Concatenated content stream data of the page
+    """
+    if backend == "pypdf":
+        contents = page.get_contents()
+        return b"" if contents is None else contents.get_data()
+
+    # pdfplumber pages wrap a pdfminer page holding the raw content streams
+    return b"".join(resolve1(stream).get_data() for stream in page.page_obj.contents)
 
-def extract_vested_data(pdf_path: str) -> Dict[str, List[Dict[str, str]]]:
+
+def _has_form_xobjects(page: Any, backend: str) -> bool:
+    """
+    Check whether a PDF page has form XObjects among its resources.
+
+    Args:
+        page: pypdf or pdfplumber page object
+        backend: Either "pypdf" or "pdfplumber"
+
+    Returns:
+        True if any XObject of the page is a form, False for images only
+    """
+    if backend == "pypdf":
+        resources = page.get("/Resources")
+        if resources is None:
+            return False
+        xobjects = resources.get_object().get("/XObject")
+        if xobjects is None:
+            return False
+        xobjects = xobjects.get_object()
+        return any(
+            xobjects[name].get_object().get("/Subtype") == "/Form" for name in xobjects
+        )
+
+    xobjects = resolve1((page.page_obj.resources or {}).get("XObject"))
+    if not xobjects:
+        return False
+    return any(
+        resolve1(xobject).get("Subtype") is _FORM_SUBTYPE
+        for xobject in xobjects.values()
+    )
+
+
+def _extract_page_text(page: Any, backend: str) -> str:
+    """
+    Extract the text of a PDF page, skipping pages that cannot contain any.
+
+    Text is only drawn between BT/ET operators or by form XObjects painted with
+    Do, so a page whose content stream has no BT, and no Do of a form XObject,
+    has nothing to extract. Pages that only paint images are skipped too. That
+    check is far cheaper than running the text extraction on the page.
+
+    Args:
+        page: pypdf or pdfplumber page object
+        backend: Either "pypdf" or "pdfplumber"
+
+    Returns:
+        Page text, an empty string for pages without text
+    """
+    try:
+        content = _page_content(page, backend)
+        has_text = b"BT" in content or (
+            b"Do" in content and _has_form_xobjects(page, backend)
+        )
+    except Exception as e:
+        # Fall back to a full extraction if the page cannot be inspected
+        logger.debug(f"Could not inspect page content: {e}")
+    else:
+        if not has_text:
+            return ""
+
+    return page.extract_text() or ""
+
+
+def _extract_page_range(
+    pdf_path: str, start: int, stop: int, backend: str = "pdfplumber"
+) -> List[str]:
+    """
+    Extract the text of a range of pages from a PDF file.
+
+    May run in a worker process, so it opens the PDF by path itself.
+
+    Args:
+        pdf_path: Path to the PDF file
+        start: Index of the first page to extract
+        stop: Index one past the last page to extract
+        backend: Either "pypdf" or "pdfplumber"
+
+    Returns:
+        List of page texts, empty strings for pages without text
+    """
+    with _open_pdf_pages(pdf_path, backend) as pages:
+        return [_extract_page_text(pages[i], backend) for i in range(start, stop)]
+
+
+def _extract_page_texts(
+    pdf_path: str, pdf_backend: str = DEFAULT_PDF_BACKEND
+) -> Tuple[str, ...]:
+    """
+    Extract the text of every page of a PDF file, in page order.
+
+    Results are cached per file, so processing the same unchanged PDF again
+    skips decoding it.
+
+    Args:
+        pdf_path: Path to the PDF file
+        pdf_backend: Text extraction backend, one of PDF_BACKENDS
+
+    Returns:
+        Tuple of page texts, empty strings for pages without text
+    """
+    _check_pdf_backend(pdf_backend)
+
+    # The modification time and size in the key invalidate stale entries
+    stat = os.stat(pdf_path)
+    return _cached_page_texts(
+        os.path.realpath(pdf_path), stat.st_mtime_ns, stat.st_size, pdf_backend
+    )
+
+
+@lru_cache(maxsize=8)
+def _cached_page_texts(
+    pdf_path: str, mtime_ns: int, size: int, backend: str
+) -> Tuple[str, ...]:
+    """
+    Extract and cache the text of every page of a PDF file, in page order.
+
+    Text extraction is CPU-bound and pages are independent, so larger PDFs are
+    split into page ranges that are extracted in parallel worker processes.
+
+    Args:
+        pdf_path: Resolved path to the PDF file
+        mtime_ns: Modification time of the file, part of the cache key
+        size: Size of the file in bytes, part of the cache key
+        backend: Either "pypdf" or "pdfplumber"
+
+    Returns:
+        Tuple of page texts, empty strings for pages without text
+    """
+    with _open_pdf_pages(pdf_path, backend) as pages:
+        page_count = len(pages)
+        logger.info(f"PDF has {page_count} pages")
+
+        # Starting worker processes costs more than it saves on small PDFs, and
+        # buys nothing without at least two CPUs to spread the pages over
+        workers = min(_available_cpus(), page_count)
+        if page_count < _PARALLEL_MIN_PAGES[backend] or workers < 2:
+            # Extract from the already open document instead of reopening it
+            return tuple(_extract_page_text(page, backend) for page in pages)
+
+    chunk_size = math.ceil(page_count / workers)
+    ranges = [
+        (start, min(start + chunk_size, page_count))
+        for start in range(0, page_count, chunk_size)
+    ]
+
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [
+            executor.submit(_extract_page_range, pdf_path, start, stop, backend)
+            for start, stop in ranges
+        ]
+        page_texts: List[str] = []
+        for future in futures:
+            page_texts.extend(future.result())
+
+    return tuple(page_texts)
+
+
+def extract_vested_data(
+    pdf_path: str, pdf_backend: str = DEFAULT_PDF_BACKEND
+) -> Dict[str, List[Dict[str, str]]]:
     """
     Extract both vested stocks and ESPP data from salary_certificate PDF.
 
     Args:
         pdf_path: Path to the salary_certificate PDF file
+        pdf_backend: Text extraction backend, one of PDF_BACKENDS
 
     Returns:
         Dictionary containing 'vested_stocks' and 'espp_data' lists
     """
 
-    with pdfplumber.open(pdf_path) as pdf:
-        all_text = ""
-        for page in pdf.pages:
-            text = page.extract_text()
-            if text:
-                all_text += text + "\n"
+    # Join page texts once instead of growing a string with +=
+    page_texts = _extract_page_texts(pdf_path, pdf_backend)
+    all_text = "\n".join(text for text in page_texts if text)
 
-        # Extract vested stocks data
-        vested_stocks = extract_vested_stocks_from_text(all_text)
+    # Extract vested stocks data
+    vested_stocks = extract_vested_stocks_from_text(all_text)
 
-        # Extract ESPP data
-        espp_data = extract_espp_from_text(all_text)
+    # Extract ESPP data
+    espp_data = extract_espp_from_text(all_text)
 
-        return {"vested_stocks": vested_stocks, "espp_data": espp_data}
+    return {"vested_stocks": vested_stocks, "espp_data": espp_data}
 
 
-def extract_transactions_from_text(text: str) -> List[Dict[str, str]]:
+def _find_transactions(text: str) -> Iterator[Match[str]]:
     """
-    Extract transaction data from text using regex patterns.
+    Find all transaction lines in text.
+
+    A plain substring test for a literal that every transaction line contains
+    rejects pages without any transactions (cover pages, disclaimers) before
+    the regex engine has to scan them.
 
     Args:
         text: Raw text containing transaction data
 
     Returns:
-        List of transaction dictionaries
+        Iterator over the transaction regex matches
     """
-    transactions = []
+    if _TXN_LITERAL not in text:
+        return iter(())
+    return _TXN_RE.finditer(text)
 
-    # Pattern to match transaction lines like:
-    # Jan-16-2024 Jun-01-2020 3.0000 $549.75 $1,175.99 + $626.24 USD DO
-    pattern = r"(\w{3}-\d{2}-\d{4})\s+(\w{3}-\d{2}-\d{4})\s+([\d.]+)\s+\$[\d,.]+"
 
-    lines = text.split("\n")
-    for line in lines:
-        # Look for date patterns at the start of lines
-        match = re.search(pattern, line)
-        if match:
-            date_sold = match.group(1)
-            quantity = match.group(3)
+def _parse_transactions(text: str) -> Iterator[Tuple[str, str, float]]:
+    """
+    Parse the transaction lines in text.
 
-            transactions.append(
-                {"Date sold or transferred": date_sold, "Quantity": quantity}
-            )
+    A line whose quantity is not a valid number (e.g. "1.2.3") is not a
+    transaction: it is logged and skipped, so it is neither counted nor summed.
 
-    return transactions
+    Args:
+        text: Raw text containing transaction data
 
+    Returns:
+        Iterator over (sell date, quantity as written, quantity) tuples
+    """
+    for match in _find_transactions(text):
+        quantity_str = match.group(3)
 
-def extract_table_from_pdf(pdf_path: str) -> List[Dict[str, Any]]:
+        try:
+            quantity = float(quantity_str)
+        except ValueError:
+            logger.warning(f"Invalid quantity value: {quantity_str}")
+            continue
+
+        yield match.group(1), quantity_str, quantity
+
+
+def extract_transactions_from_text(text: str) -> Tuple[List[str], List[float]]:
     """
-    Extract table data from PDF file.
+    Extract transaction data from text using regex patterns.
+
+    Transactions are returned as two parallel lists rather than one dictionary
+    per row, which is smaller and faster to aggregate.
 
     Args:
-        pdf_path: Path to the PDF file
+        text: Raw text containing transaction data
 
     Returns:
-        List of dictionaries representing table rows
+        Tuple of (sell dates, quantities), one entry per transaction
     """
-    all_transactions = []
+    dates: List[str] = []
+    quantities: List[float] = []
 
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            logger.info(f"PDF has {len(pdf.pages)} pages")
+    # Scan the whole text in one pass instead of looping over split lines
+    for date_sold, _, quantity in _parse_transactions(text):
+        dates.append(date_sold)
+        quantities.append(quantity)
+
+    return dates, quantities
+
+
+def _stream_transactions(
+    text: str,
+    date_quantities: DefaultDict[str, float],
+    individual: Optional[List[Tuple[str, str]]] = None,
+) -> Tuple[int, float]:
+    """
+    Parse transaction lines and add their quantities straight into per-date totals.
+
+    This fuses extraction, float conversion and aggregation into one pass, so
+    no intermediate list of transaction dictionaries is built.
+
+    Args:
+        text: Raw text containing transaction data
+        date_quantities: Totals by date, updated in place
+        individual: Optional list that (date, quantity) pairs are appended to
+
+    Returns:
+        Tuple of (number of valid transactions found, total quantity)
+    """
+    count = 0
+    total = 0.0
+
+    for date_sold, quantity_str, quantity in _parse_transactions(text):
+        count += 1
 
-            for page_num, page in enumerate(pdf.pages, 1):
-                logger.info(f"Processing page {page_num}")
+        if individual is not None:
+            individual.append((date_sold, quantity_str))
 
-                # Extract all text from the page
-                page_text = page.extract_text()
+        date_quantities[date_sold] += quantity
+        total += quantity
 
-                if page_text:
-                    # Look for transaction data in the text
-                    transactions = extract_transactions_from_text(page_text)
-                    if transactions:
-                        logger.info(
-                            f"Found {len(transactions)} transactions on page {page_num}"
-                        )
+    return count, total
 
-                        # Add all transactions (including duplicates)
-                        all_transactions.extend(transactions)
 
-                        # Log first few transactions for debugging
-                        for i, trans in enumerate(transactions[:3]):
-                            logger.info(f"Transaction {i + 1}: {trans}")
-                    else:
-                        logger.info(f"No transactions found on page {page_num}")
+def extract_table_from_pdf(
+    pdf_path: str, pdf_backend: str = DEFAULT_PDF_BACKEND
+) -> Tuple[List[str], List[float]]:
+    """
+    Extract table data from PDF file.
+
+    Args:
+        pdf_path: Path to the PDF file
+        pdf_backend: Text extraction backend, one of PDF_BACKENDS
+
+    Returns:
+        Tuple of (sell dates, quantities), one entry per transaction
+    """
+    all_dates: List[str] = []
+    all_quantities: List[float] = []
+
+    try:
+        page_texts = _extract_page_texts(pdf_path, pdf_backend)
+        for page_num, page_text in enumerate(page_texts, 1):
+            logger.info(f"Processing page {page_num}")
+
+            if page_text:
+                # Look for transaction data in the text
+                dates, quantities = extract_transactions_from_text(page_text)
+                if dates:
+                    logger.info(f"Found {len(dates)} transactions on page {page_num}")
+
+                    # Add all transactions (including duplicates)
+                    all_dates.extend(dates)
+                    all_quantities.extend(quantities)
+
+                    # Log first few transactions for debugging
+                    for i, trans in enumerate(zip(dates[:3], quantities[:3])):
+                        logger.info(f"Transaction {i + 1}: {trans}")
+                else:
+                    logger.info(f"No transactions found on page {page_num}")
 
     except Exception as e:
         logger.error(f"Error processing PDF: {e}")
         raise
 
-    return all_transactions
+    return all_dates, all_quantities
 
 
-def aggregate_by_date(data: List[Dict[str, Any]]) -> Dict[str, float]:
+def aggregate_by_date(dates: List[str], quantities: List[float]) -> Dict[str, float]:
     """
     Aggregate quantities by date, summing up quantities for the same date.
 
     Args:
-        data: List of transaction dictionaries
+        dates: Sell date of each transaction
+        quantities: Quantity of each transaction, parallel to dates
 
     Returns:
         Dictionary with dates as keys and total quantities as values
     """
-    date_quantities = {}
+    # Like zip(), ignore the tail of the longer list
+    count = min(len(dates), len(quantities))
+    if count < _VECTORIZE_MIN_ROWS:
+        date_quantities: Dict[str, float] = defaultdict(float)
 
-    for transaction in data:
-        date_sold = transaction.get("Date sold or transferred", "")
-        quantity_str = transaction.get("Quantity", "0")
+        for date_sold, quantity in zip(dates, quantities):
+            date_quantities[date_sold] += quantity
 
-        # Convert quantity to float
-        try:
-            quantity = float(quantity_str)
-        except (ValueError, TypeError):
-            logger.warning(f"Invalid quantity value: {quantity_str}")
-            continue
+        return dict(date_quantities)
 
-        # Add to the total for this date
-        if date_sold in date_quantities:
-            date_quantities[date_sold] += quantity
-        else:
-            date_quantities[date_sold] = quantity
+    # Only large inputs pay for importing numpy
+    import numpy as np
+
+    # Group by date in C: map each date to a bin index, then sum the bins
+    unique_dates, first_index, inverse = np.unique(
+        np.asarray(dates[:count]), return_index=True, return_inverse=True
+    )
+    totals = np.bincount(
+        inverse.ravel(), weights=np.asarray(quantities[:count], dtype=np.float64)
+    )
+
+    # np.unique sorts the dates; restore the order they were first seen in
+    order = np.argsort(first_index)
+    return dict(zip(unique_dates[order].tolist(), totals[order].tolist()))
 
-    return date_quantities
 
+def display_results(
+    aggregated_data: Dict[str, float],
+    transaction_count: int,
+    individual: Optional[List[Tuple[str, str]]] = None,
+) -> None:
+    """Display the aggregated results by date and optionally individual transactions.
 
-def display_results(data: List[Dict[str, Any]], show_individual: bool = False) -> None:
-    """Display the aggregated results by date and optionally individual transactions."""
-    if not data:
+    Args:
+        aggregated_data: Total quantities keyed by sell date
+        transaction_count: Number of individual transactions aggregated
+        individual: (date, quantity) pairs to list before the aggregated table
+    """
+    if not transaction_count:
         print("No data to display")
         return
 
-    # Show individual transactions if requested
-    if show_individual:
-        print("=" * 80)
-        print("INDIVIDUAL TRANSACTIONS")
-        print("=" * 80)
-        print(f"{'Date':<15} {'Quantity':<15}")
-        print("-" * 30)
-
-        for i, transaction in enumerate(data, 1):
-            date_sold = transaction.get("Date sold or transferred", "")
-            quantity = transaction.get("Quantity", "0")
+    # Build the whole report and write it at once instead of print() per line
+    lines: List[str] = []
 
+    # Show individual transactions if requested
+    if individual is not None:
+        lines.append("=" * 80)
+        lines.append("INDIVIDUAL TRANSACTIONS")
+        lines.append("=" * 80)
+        lines.append(f"{'Date':<15} {'Quantity':<15}")
+        lines.append("-" * 30)
+
+        for date_sold, quantity in individual:
             # Format date for display
-            from datetime import datetime
-
             try:
-                dt = datetime.strptime(date_sold, "%b-%d-%Y")
+                dt = _parse_sold_date(date_sold)
                 formatted_date = dt.strftime("%d.%m.%Y")
             except ValueError:
                 formatted_date = date_sold
 
-            print(f"{formatted_date:<15} {quantity:<15}")
+            lines.append(f"{formatted_date:<15} {quantity:<15}")
 
-        print("-" * 30)
-        print(f"Total individual transactions: {len(data)}")
-        print("\n")
+        lines.append("-" * 30)
+        lines.append(f"Total individual transactions: {len(individual)}")
+        lines.append("\n")
 
     # Show aggregated data by date
-    aggregated_data = aggregate_by_date(data)
+    lines.append("=" * 60)
+    lines.append("AGGREGATED QUANTITIES BY DATE:")
+    lines.append("=" * 60)
+    lines.append(f"{'Sell Date':<25} {'Quantity':<15}")
+    lines.append("-" * 60)
+
+    # Sort by date in ascending order, parsing each date once and reusing it
+    # for display; the index keeps the sort stable for dates that fail to parse
+    decorated = []
+    for index, (date_sold, total_qty) in enumerate(aggregated_data.items()):
+        try:
+            dt = _parse_sold_date(date_sold)
+            formatted_date = dt.strftime("%d.%m.%Y")
+        except ValueError:
+            # If parsing fails, use a very early date to put it first and
+            # display the original string
+            dt = datetime(1900, 1, 1)
+            formatted_date = date_sold
+        decorated.append((dt, index, formatted_date, total_qty))
+    decorated.sort()
 
-    print("=" * 60)
-    print("AGGREGATED QUANTITIES BY DATE:")
-    print("=" * 60)
-    print(f"{'Sell Date':<25} {'Quantity':<15}")
-    print("-" * 60)
+    total_quantity = 0
+    for _, _, formatted_date, total_qty in decorated:
+        lines.append(f"{formatted_date:<25} {total_qty:<15.4f}")
+        total_quantity += total_qty
 
-    # Sort by date in ascending order
-    from datetime import datetime
+    lines.append("=" * 60)
+    lines.append(f"Total unique dates: {len(aggregated_data)}")
+    lines.append(f"Total individual transactions: {transaction_count}")
+    lines.append(f"Grand total quantity: {total_quantity:.4f}")
+    lines.append("=" * 60)
 
-    def parse_date(date_str):
-        """Parse date string in format 'MMM-DD-YYYY' to datetime object."""
-        try:
-            return datetime.strptime(date_str, "%b-%d-%Y")
-        except ValueError:
-            # If parsing fails, return a very early date to put it first
-            return datetime(1900, 1, 1)
+    sys.stdout.write("\n".join(lines) + "\n")
 
-    def format_date(date_str):
-        """Convert date from MMM-DD-YYYY to DD.MM.YYYY format."""
-        try:
-            dt = datetime.strptime(date_str, "%b-%d-%Y")
-            return dt.strftime("%d.%m.%Y")
-        except ValueError:
-            return date_str  # Return original if parsing fails
 
-    sorted_dates = sorted(aggregated_data.items(), key=lambda x: parse_date(x[0]))
+def _find_line(text: str, marker: str, start: int = 0) -> Tuple[int, int]:
+    """
+    Locate the first line containing a marker, starting the search at an offset.
 
-    total_quantity = 0
-    for date_sold, total_qty in sorted_dates:
-        formatted_date = format_date(date_sold)
-        print(f"{formatted_date:<25} {total_qty:<15.4f}")
-        total_quantity += total_qty
+    Args:
+        text: Raw text to search
+        marker: Substring the line must contain
+        start: Offset to start searching from
 
-    print("=" * 60)
-    print(f"Total unique dates: {len(aggregated_data)}")
-    print(f"Total individual transactions: {len(data)}")
-    print(f"Grand total quantity: {total_quantity:.4f}")
-    print("=" * 60)
+    Returns:
+        Tuple of (line start, line end) offsets, or (-1, -1) if not found
+    """
+    pos = text.find(marker, start)
+    if pos < 0:
+        return -1, -1
+
+    line_start = text.rfind("\n", 0, pos) + 1
+    line_end = text.find("\n", pos)
+    if line_end < 0:
+        line_end = len(text)
+
+    return line_start, line_end
 
 
 def extract_vested_stocks_from_text(text: str) -> List[Dict[str, str]]:
@@ -235,52 +713,45 @@ def extract_vested_stocks_from_text(text: str) -> List[Dict[str, str]]:
     Returns:
         List of dictionaries with Vest Date and Shares
     """
-    vested_stocks = []
-    lines = text.split("\n")
+    vested_stocks: List[Dict[str, str]] = []
 
     # Find the start of the Vested Stocks section
-    in_vested_section = False
-    header_line_count = 0
-    for line in lines:
-        if "Vested Stocks" in line and "2024" in line:
-            in_vested_section = True
-            continue
+    start, header_end = _find_line(text, _VESTED_SECTION)
+    while start >= 0 and _VESTED_YEAR not in text[start:header_end]:
+        start, header_end = _find_line(text, _VESTED_SECTION, header_end)
+
+    # Nothing to parse if there is no section or the ESPP section comes first
+    if start < 0 or text.find(_ESPP_MARKER, 0, start) >= 0:
+        return vested_stocks
 
-        # Stop when we reach the ESPP section
-        if "ESPP" in line:
-            break
+    # Stop when we reach the ESPP section
+    end, _ = _find_line(text, _ESPP_MARKER, header_end)
+    if end < 0:
+        end = len(text)
 
-        if in_vested_section and line.strip():
+    award_token, date_token = _VESTED_HEADER_TOKENS
+    header_line_count = 0
+    for line in text[header_end:end].splitlines():
+        stripped = line.strip()
+        if stripped:
             # Skip header lines
-            if ("Award" in line and "Date" in line) or ("Date Date Price" in line):
+            if (award_token in line and date_token in line) or (
+                _VESTED_SUBHEADER in line
+            ):
                 header_line_count += 1
                 continue
 
             # Skip the total line at the end
-            if (
-                line.strip()
-                .replace(".", "")
-                .replace("'", "")
-                .replace(" ", "")
-                .isdigit()
-            ):
+            if stripped.translate(_TOTAL_LINE_TBL).isdigit():
                 continue
 
-            # Parse data lines - format: Award_Date Award_ID Vest_Date Award_Price Market_Value Shares ...
-            parts = line.split()
-            if len(parts) >= 6:
-                try:
-                    # Extract vest date (3rd column, index 2) and shares (6th column, index 5)
-                    vest_date = parts[2]
-                    shares = parts[5]
-
-                    # Validate date format (should be DD.MM.YYYY)
-                    if "." in vest_date and len(vest_date.split(".")) == 3:
-                        vested_stocks.append({"Vest Date": vest_date, "Shares": shares})
-                except (IndexError, ValueError) as e:
-                    logger.debug(
-                        f"Skipping line due to parsing error: {line}, error: {e}"
-                    )
+            # Parse data lines; the pattern also validates the DD.MM.YYYY vest
+            # date (3rd column) and the shares (6th column)
+            match = _VEST_ROW_RE.match(line)
+            if match:
+                vested_stocks.append({"Vest Date": match[1], "Shares": match[2]})
+            else:
+                logger.debug(f"Skipping line that is not a data row: {line}")
 
     return vested_stocks
 
@@ -295,68 +766,61 @@ def extract_espp_from_text(text: str) -> List[Dict[str, str]]:
     Returns:
         List of dictionaries with Off Period and Purchased Shares
     """
-    espp_data = []
-    lines = text.split("\n")
+    espp_data: List[Dict[str, str]] = []
 
     # Find the start of the ESPP section
-    in_espp_section = False
+    start, header_end = _find_line(text, _ESPP_SECTION)
+    if start < 0:
+        return espp_data
+
+    # Stop at the end of data or next section
+    end = len(text)
+    for marker in _ESPP_END_MARKERS:
+        marker_start, _ = _find_line(text, marker, header_end)
+        if marker_start >= 0:
+            end = min(end, marker_start)
+
+    period_token, purchased_token = _ESPP_HEADER_TOKENS
     header_line_count = 0
-    for line in lines:
-        if "ESPP (Employee Stock Purchase Plan)" in line:
-            in_espp_section = True
-            continue
-
-        # Stop at the end of data or next section
-        if in_espp_section and ("Total amount" in line or "Page" in line):
-            break
-
-        if in_espp_section and line.strip():
+    for line in text[header_end:end].splitlines():
+        stripped = line.strip()
+        if stripped:
             # Skip header lines
-            if ("Off Period" in line and "Purchased" in line) or (
-                "Shares Price" in line
+            if (period_token in line and purchased_token in line) or (
+                _ESPP_SUBHEADER in line
             ):
                 header_line_count += 1
                 continue
 
             # Skip lines that start with 'CHF' (these are continuation/summary lines)
-            if line.strip().startswith("CHF"):
+            if stripped.startswith(_ESPP_SUMMARY_PREFIX):
                 continue
 
-            # Parse data lines - format: Off_Period Purchased_Shares FMV_Price Purchase_Price ...
-            parts = line.split()
-            if len(parts) >= 2:
-                try:
-                    # Extract off period (1st column, index 0) and purchased shares (2nd column, index 1)
-                    off_period = parts[0]
-                    purchased_shares = parts[1]
-
-                    # Validate that off period looks like a period identifier (should be digits)
-                    if off_period.isdigit() or (
-                        off_period.isalnum()
-                        and purchased_shares.replace(".", "").isdigit()
-                    ):
-                        espp_data.append(
-                            {
-                                "Off Period": off_period,
-                                "Purchased Shares": purchased_shares,
-                            }
-                        )
-                except (IndexError, ValueError) as e:
-                    logger.debug(
-                        f"Skipping line due to parsing error: {line}, error: {e}"
-                    )
+            # Parse data lines - off period (1st column) and purchased shares (2nd);
+            # the pattern also validates that the off period looks like a period
+            match = _ESPP_ROW_RE.match(line)
+            if match:
+                espp_data.append(
+                    {
+                        "Off Period": match["period"],
+                        "Purchased Shares": match["shares"],
+                    }
+                )
 
     return espp_data
 
     return espp_data
 
 
-def extract_vested_stocks(pdf_path: str) -> Dict[str, List[Dict[str, str]]]:
+def extract_vested_stocks(
+    pdf_path: str, pdf_backend: str = DEFAULT_PDF_BACKEND
+) -> Dict[str, List[Dict[str, str]]]:
     """
     Extract both vested stocks and ESPP data from vested stocks PDF.
 
     Args:
         pdf_path: Path to the vested stocks PDF file
+        pdf_backend: Text extraction backend, one of PDF_BACKENDS
 
     Returns:
         Dictionary containing both vested stocks and ESPP data
@@ -364,32 +828,27 @@ def extract_vested_stocks(pdf_path: str) -> Dict[str, List[Dict[str, str]]]:
     results = {"vested_stocks": [], "espp_data": []}
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            logger.info(f"PDF has {len(pdf.pages)} pages")
-
-            for page_num, page in enumerate(pdf.pages, 1):
-                logger.info(f"Processing page {page_num}")
-
-                # Extract all text from the page
-                page_text = page.extract_text()
-
-                if page_text:
-                    # Extract vested stocks data
-                    vested_stocks = extract_vested_stocks_from_text(page_text)
-                    if vested_stocks:
-                        logger.info(
-                            f"Found {len(vested_stocks)} vested stock "
-                            f"entries on page {page_num}"
-                        )
-                        results["vested_stocks"].extend(vested_stocks)
-
-                    # Extract ESPP data
-                    espp_data = extract_espp_from_text(page_text)
-                    if espp_data:
-                        logger.info(
-                            f"Found {len(espp_data)} ESPP entries on page {page_num}"
-                        )
-                        results["espp_data"].extend(espp_data)
+        page_texts = _extract_page_texts(pdf_path, pdf_backend)
+        for page_num, page_text in enumerate(page_texts, 1):
+            logger.info(f"Processing page {page_num}")
+
+            if page_text:
+                # Extract vested stocks data
+                vested_stocks = extract_vested_stocks_from_text(page_text)
+                if vested_stocks:
+                    logger.info(
+                        f"Found {len(vested_stocks)} vested stock "
+                        f"entries on page {page_num}"
+                    )
+                    results["vested_stocks"].extend(vested_stocks)
+
+                # Extract ESPP data
+                espp_data = extract_espp_from_text(page_text)
+                if espp_data:
+                    logger.info(
+                        f"Found {len(espp_data)} ESPP entries on page {page_num}"
+                    )
+                    results["espp_data"].extend(espp_data)
 
     except Exception as e:
         logger.error(f"Error processing PDF: {e}")
@@ -402,111 +861,113 @@ def display_vested_results(
     data: Dict[str, List[Dict[str, str]]], show_individual: bool = False
 ) -> None:
     """Display the results from salary_certificate PDF extraction."""
-    print("=" * 80)
-    print("VESTED STOCKS 2024")
-    print("=" * 80)
+    # Build the whole report and write it at once instead of print() per line
+    lines: List[str] = ["=" * 80, "VESTED STOCKS 2024", "=" * 80]
 
     vested_stocks = data["vested_stocks"]
     if vested_stocks:
         # Show individual vested transactions if requested
         if show_individual:
-            print("INDIVIDUAL VESTED TRANSACTIONS")
-            print("=" * 80)
-            print(f"{'Vest Date':<15} {'Quantity':<15}")
-            print("-" * 30)
+            lines.append("INDIVIDUAL VESTED TRANSACTIONS")
+            lines.append("=" * 80)
+            lines.append(f"{'Vest Date':<15} {'Quantity':<15}")
+            lines.append("-" * 30)
 
             for entry in vested_stocks:
                 vest_date = entry["Vest Date"]
                 shares = entry["Shares"]
-                print(f"{vest_date:<15} {shares:<15}")
+                lines.append(f"{vest_date:<15} {shares:<15}")
 
-            print("-" * 30)
-            print(f"Total individual vested transactions: {len(vested_stocks)}")
-            print("\nAGGREGATED VESTED STOCKS BY DATE")
-            print("=" * 80)
+            lines.append("-" * 30)
+            lines.append(f"Total individual vested transactions: {len(vested_stocks)}")
+            lines.append("\nAGGREGATED VESTED STOCKS BY DATE")
+            lines.append("=" * 80)
 
         # Aggregate shares by vest date
-        date_shares = {}
+        date_shares: Dict[str, float] = defaultdict(float)
         for entry in vested_stocks:
             vest_date = entry["Vest Date"]
             shares = entry["Shares"]
 
             # Convert shares to float
             try:
-                shares_float = float(shares.replace(",", "").replace("'", ""))
-                if vest_date in date_shares:
-                    date_shares[vest_date] += shares_float
-                else:
-                    date_shares[vest_date] = shares_float
+                shares_float = _parse_number(shares)
+                date_shares[vest_date] += shares_float
             except ValueError:
                 pass
 
-        # Sort dates chronologically
-        from datetime import datetime
-
-        def parse_vest_date(date_str):
-            """Parse date string in format 'DD.MM.YYYY' to datetime object."""
+        # Sort dates chronologically, parsing each date once; the index keeps
+        # the sort stable for dates that fail to parse
+        decorated = []
+        for index, (vest_date, total_qty) in enumerate(date_shares.items()):
             try:
-                return datetime.strptime(date_str, "%d.%m.%Y")
+                dt = _parse_vest_date(vest_date)
             except ValueError:
-                # If parsing fails, return a very early date
-                return datetime(1900, 1, 1)
-
-        sorted_dates = sorted(date_shares.items(), key=lambda x: parse_vest_date(x[0]))
-
-        print(f"{'Vest Date':<15} {'Quantity':<15}")
-        print("-" * 30)
-
-        total_shares = 0
-        for vest_date, shares in sorted_dates:
-            print(f"{vest_date:<15} {shares:<15.3f}")
-            total_shares += shares
-
-        print("-" * 30)
-        print(f"Total unique dates: {len(date_shares)}")
-        print(f"Total shares: {total_shares:.3f}")
+                # If parsing fails, use a very early date
+                dt = datetime(1900, 1, 1)
+            decorated.append((dt, index, vest_date, total_qty))
+        decorated.sort()
+
+        lines.append(f"{'Vest Date':<15} {'Quantity':<15}")
+        lines.append("-" * 30)
+
+        total_shares = 0.0
+        for _, _, vest_date, total_qty in decorated:
+            lines.append(f"{vest_date:<15} {total_qty:<15.3f}")
+            total_shares += total_qty
+
+        lines.append("-" * 30)
+        lines.append(f"Total unique dates: {len(date_shares)}")
+        lines.append(f"Total shares: {total_shares:.3f}")
     else:
-        print("No vested stocks data found")
+        lines.append("No vested stocks data found")
 
-    print("\n" + "=" * 80)
-    print("ESPP (Employee Stock Purchase Plan)")
-    print("=" * 80)
+    lines.append("\n" + "=" * 80)
+    lines.append("ESPP (Employee Stock Purchase Plan)")
+    lines.append("=" * 80)
 
     espp_data = data["espp_data"]
     if espp_data:
-        print(f"{'Off Period':<15} {'Purchased Shares':<20}")
-        print("-" * 35)
+        lines.append(f"{'Off Period':<15} {'Purchased Shares':<20}")
+        lines.append("-" * 35)
 
         total_purchased = 0
         for entry in espp_data:
             off_period = entry["Off Period"]
             purchased_shares = entry["Purchased Shares"]
-            print(f"{off_period:<15} {purchased_shares:<20}")
+            lines.append(f"{off_period:<15} {purchased_shares:<20}")
 
             # Try to add to total
             try:
-                clean_shares = purchased_shares.replace(",", "").replace("'", "")
-                total_purchased += float(clean_shares)
+                total_purchased += _parse_number(purchased_shares)
             except ValueError:
                 pass
 
-        print("-" * 35)
-        print(f"Total entries: {len(espp_data)}")
-        print(f"Total purchased shares: {total_purchased:.4f}")
+        lines.append("-" * 35)
+        lines.append(f"Total entries: {len(espp_data)}")
+        lines.append(f"Total purchased shares: {total_purchased:.4f}")
     else:
-        print("No ESPP data found")
+        lines.append("No ESPP data found")
 
-    print("=" * 80)
+    lines.append("=" * 80)
+
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def read_vested_data(
-    pdf_path: str, show_individual: bool = False
+    pdf_path: str,
+    show_individual: bool = False,
+    pdf_backend: str = DEFAULT_PDF_BACKEND,
+    display: bool = True,
 ) -> tuple[float, float]:
     """Extract and display data from salary_certificate PDF.
 
     Args:
         pdf_path: Path to the PDF file
         show_individual: Whether to show individual vested transactions
+        pdf_backend: Text extraction backend, one of PDF_BACKENDS
+        display: Whether to print the vested stocks and ESPP tables; when
+            False only the totals are computed
 
     Returns:
         Tuple of (total shares vested, total shares purchased)
@@ -517,16 +978,17 @@ def read_vested_data(
 
     try:
         # Extract data from PDF
-        data = extract_vested_data(pdf_path)
+        data = extract_vested_data(pdf_path, pdf_backend)
 
         if data["vested_stocks"] or data["espp_data"]:
-            display_vested_results(data, show_individual)
+            if display:
+                display_vested_results(data, show_individual)
 
             # Calculate total vested shares
             total_vested = 0.0
             for entry in data["vested_stocks"]:
                 try:
-                    shares = float(entry["Shares"].replace(",", "").replace("'", ""))
+                    shares = _parse_number(entry["Shares"])
                     total_vested += shares
                 except ValueError:
                     pass
@@ -536,7 +998,7 @@ def read_vested_data(
             for entry in data["espp_data"]:
                 try:
                     purchased_shares = entry["Purchased Shares"]
-                    shares = float(purchased_shares.replace(",", "").replace("'", ""))
+                    shares = _parse_number(purchased_shares)
                     total_purchased += shares
                 except ValueError:
                     pass
@@ -544,6 +1006,11 @@ def read_vested_data(
             return total_vested, total_purchased
         else:
             print("No data extracted from PDF")
+            if pdf_backend == "pypdf":
+                logger.warning(
+                    "The pypdf backend found no data; retry with "
+                    "--pdf-backend pdfplumber"
+                )
             return 0.0, 0.0
 
     except Exception as e:
@@ -551,12 +1018,20 @@ def read_vested_data(
         return 0.0, 0.0
 
 
-def read_sold_shares(pdf_path: str, show_individual: bool = False) -> float:
+def read_sold_shares(
+    pdf_path: str,
+    show_individual: bool = False,
+    pdf_backend: str = DEFAULT_PDF_BACKEND,
+    display: bool = True,
+) -> float:
     """Extract and display sold shares data.
 
     Args:
         pdf_path: Path to the PDF file
         show_individual: Whether to show individual transactions
+        pdf_backend: Text extraction backend, one of PDF_BACKENDS
+        display: Whether to print the sold shares tables; when False only
+            the total is computed
 
     Returns:
         Total shares sold
@@ -566,24 +1041,34 @@ def read_sold_shares(pdf_path: str, show_individual: bool = False) -> float:
         return 0.0
 
     try:
-        # Extract transaction data from PDF
-        transactions = extract_table_from_pdf(pdf_path)
-
-        if transactions:
-            display_results(transactions, show_individual)
-
-            # Calculate total sold shares
-            total_sold = 0.0
-            for transaction in transactions:
-                try:
-                    quantity = float(transaction.get("Quantity", "0"))
-                    total_sold += quantity
-                except ValueError:
-                    pass
-
+        # Extract, convert and aggregate transactions in a single pass per page
+        date_quantities: DefaultDict[str, float] = defaultdict(float)
+        # Individual transactions are only kept when they will be displayed
+        individual: Optional[List[Tuple[str, str]]] = (
+            [] if display and show_individual else None
+        )
+        transaction_count = 0
+        total_sold = 0.0
+
+        for page_text in _extract_page_texts(pdf_path, pdf_backend):
+            if page_text:
+                count, quantity = _stream_transactions(
+                    page_text, date_quantities, individual
+                )
+                transaction_count += count
+                total_sold += quantity
+
+        if transaction_count:
+            if display:
+                display_results(date_quantities, transaction_count, individual)
             return total_sold
         else:
             print("No transaction data extracted from PDF")
+            if pdf_backend == "pypdf":
+                logger.warning(
+                    "The pypdf backend found no data; retry with "
+                    "--pdf-backend pdfplumber"
+                )
             return 0.0
 
     except Exception as e:
@@ -668,6 +1153,14 @@ Examples:
         help="Show individual transactions in addition to aggregated data",
     )
 
+    parser.add_argument(
+        "--pdf-backend",
+        choices=PDF_BACKENDS,
+        default=DEFAULT_PDF_BACKEND,
+        help="Text extraction backend; pypdf is faster but may not lay out "
+        f"every PDF correctly (default: {DEFAULT_PDF_BACKEND})",
+    )
+
     return parser.parse_args()
 
 
@@ -684,7 +1177,7 @@ if __name__ == "__main__":
     # Process vested stocks and ESPP data
     if not args.no_vested:
         total_vested, total_purchased = read_vested_data(
-            args.vested_pdf, args.show_individual
+            args.vested_pdf, args.show_individual, args.pdf_backend
         )
 
     # Add separator if processing both types
@@ -693,7 +1186,9 @@ if __name__ == "__main__":
 
     # Process sold shares data
     if not args.no_sold:
-        total_sold = read_sold_shares(args.sold_pdf, args.show_individual)
+        total_sold = read_sold_shares(
+            args.sold_pdf, args.show_individual, args.pdf_backend
+        )
 
     # Display summary if both types were processed
     if not args.no_vested and not args.no_sold:
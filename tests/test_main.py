@@ -0,0 +1,198 @@
+"""Tests for the PDF text parsing helpers."""
+
+from collections import defaultdict
+from typing import DefaultDict, Dict, List, Tuple
+
+import pytest
+
+from tax_form.main import (
+    _ESPP_ROW_RE,
+    _VECTORIZE_MIN_ROWS,
+    _VEST_ROW_RE,
+    _stream_transactions,
+    aggregate_by_date,
+    extract_espp_from_text,
+    extract_transactions_from_text,
+    extract_vested_stocks_from_text,
+)
+
+# Sales summary text with rows indented past the title, as pypdf lays it out
+SALES_TEXT = "\n".join(
+    [
+        "Custom transaction summary",
+        "  Date sold Date acquired Quantity Cost basis Proceeds Gain/loss",
+        "  Jan-19-2024 Jun-01-2020 28.1033 $361.75 $1,175.99 + $626.24 USD DO",
+        "\tJan-19-2024 Jun-01-2021 1.5000 $361.75 $1,175.99 + $626.24 USD DO",
+        "Feb-02-2024\tJun-01-2020 3.0000 $549.75 $1,175.99 + $626.24 USD DO",
+        "  Total 32.6033 $1,273.25",
+    ]
+)
+
+
+def test_extract_transactions_from_text_allows_indented_rows() -> None:
+    assert extract_transactions_from_text(SALES_TEXT) == (
+        ["Jan-19-2024", "Jan-19-2024", "Feb-02-2024"],
+        [28.1033, 1.5, 3.0],
+    )
+
+
+def test_stream_transactions_allows_indented_rows() -> None:
+    date_quantities: DefaultDict[str, float] = defaultdict(float)
+    individual: List[Tuple[str, str]] = []
+
+    count, total = _stream_transactions(SALES_TEXT, date_quantities, individual)
+
+    assert count == 3
+    assert total == pytest.approx(32.6033)
+    assert date_quantities == pytest.approx(
+        {"Jan-19-2024": 29.6033, "Feb-02-2024": 3.0}
+    )
+    assert individual == [
+        ("Jan-19-2024", "28.1033"),
+        ("Jan-19-2024", "1.5000"),
+        ("Feb-02-2024", "3.0000"),
+    ]
+
+
+def test_transaction_parsers_skip_invalid_quantities_alike() -> None:
+    text = SALES_TEXT + "\n".join(
+        [
+            "",
+            "Feb-02-2024 Jun-01-2020 1.2.3 $549.75 $1,175.99 + $626.24 USD DO",
+            "  Mar-04-2024 Jun-01-2020 . $549.75 $1,175.99 + $626.24 USD DO",
+        ]
+    )
+    dates, quantities = extract_transactions_from_text(text)
+    date_quantities: DefaultDict[str, float] = defaultdict(float)
+    individual: List[Tuple[str, str]] = []
+
+    count, total = _stream_transactions(text, date_quantities, individual)
+
+    assert count == len(dates) == len(individual) == 3
+    assert [date_sold for date_sold, _ in individual] == dates
+    assert [float(quantity) for _, quantity in individual] == quantities
+    assert total == pytest.approx(sum(quantities))
+    assert dict(date_quantities) == aggregate_by_date(dates, quantities)
+
+
+@pytest.mark.parametrize(
+    "line, period, shares",
+    [
+        # An all-digit off period accepts any purchased shares token
+        ("202401 n/a 150.00 127.50", "202401", "n/a"),
+        # Otherwise the shares only need digits and dots, with at least one digit
+        ("Q1 1.. 150.00 127.50", "Q1", "1.."),
+        ("Q2 12.500 150.00 127.50", "Q2", "12.500"),
+        ("   Q3 7 150.00 127.50", "Q3", "7"),
+    ],
+)
+def test_espp_row_matches(line: str, period: str, shares: str) -> None:
+    match = _ESPP_ROW_RE.match(line)
+    assert match is not None
+    assert match["period"] == period
+    assert match["shares"] == shares
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "a_b 12.500 150.00 127.50",
+        "Q1 n/a 150.00 127.50",
+        "Q1 ... 150.00 127.50",
+        "Q1 12,5 150.00 127.50",
+        "Q1",
+    ],
+)
+def test_espp_row_rejects(line: str) -> None:
+    assert _ESPP_ROW_RE.match(line) is None
+
+
+@pytest.mark.parametrize(
+    "line, vest_date, shares",
+    [
+        (
+            "01.03.2021 RS12345 15.03.2024 250.00 4'000.00 16.000",
+            "15.03.2024",
+            "16.000",
+        ),
+        (
+            "  01.03.2021 RS12345 15.06.2024 250.00 2,000.00 1,000",
+            "15.06.2024",
+            "1,000",
+        ),
+        ("01.03.2021 RS12345 15.09.2024 250.00 2'000.00 8 CHF", "15.09.2024", "8"),
+    ],
+)
+def test_vest_row_matches(line: str, vest_date: str, shares: str) -> None:
+    match = _VEST_ROW_RE.match(line)
+    assert match is not None
+    assert match.groups() == (vest_date, shares)
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "01.03.2021 RS12345 2024-03-15 250.00 4'000.00 16.000",
+        "01.03.2021 RS12345 15.03.2024 250.00 4'000.00 n/a",
+        "01.03.2021 RS12345 15.03.2024 250.00 4'000.00 16.0x",
+        "01.03.2021 RS12345 15.03.2024 250.00",
+    ],
+)
+def test_vest_row_rejects(line: str) -> None:
+    assert _VEST_ROW_RE.match(line) is None
+
+
+def test_extract_espp_from_text() -> None:
+    text = "\n".join(
+        [
+            "ESPP (Employee Stock Purchase Plan)",
+            "Off Period Purchased FMV Purchase",
+            "Shares Price Price",
+            "202401 n/a 150.00 127.50",
+            "  Q1 1.. 150.00 127.50",
+            "a_b 12.500 150.00 127.50",
+            "CHF 1'234.00",
+            "Total amount 1'234.00",
+        ]
+    )
+    assert extract_espp_from_text(text) == [
+        {"Off Period": "202401", "Purchased Shares": "n/a"},
+        {"Off Period": "Q1", "Purchased Shares": "1.."},
+    ]
+
+
+def test_extract_vested_stocks_from_text() -> None:
+    text = "\n".join(
+        [
+            "Vested Stocks 2024",
+            "Award Award Vest Award Market Shares",
+            "Date ID Date Price Value",
+            "01.03.2021 RS12345 15.03.2024 250.00 4'000.00 16.000",
+            "  01.03.2021 RS12345 15.06.2024 250.00 2,000.00 1,000",
+            "01.03.2021 RS12345 n/a 250.00 2,000.00 8",
+            "1'016.000",
+            "ESPP (Employee Stock Purchase Plan)",
+        ]
+    )
+    assert extract_vested_stocks_from_text(text) == [
+        {"Vest Date": "15.03.2024", "Shares": "16.000"},
+        {"Vest Date": "15.06.2024", "Shares": "1,000"},
+    ]
+
+
+@pytest.mark.parametrize("extra_dates, extra_quantities", [(0, 0), (3, 0), (0, 3)])
+def test_aggregate_by_date_vectorized_matches_loop(
+    extra_dates: int, extra_quantities: int
+) -> None:
+    # Dates repeat out of order, so sorting them would change the result order
+    days = ["Mar-05-2024", "Jan-16-2024", "Feb-29-2024", "Jan-02-2024"]
+    rows = _VECTORIZE_MIN_ROWS * 2
+    dates = [days[i % len(days)] for i in range(rows + extra_dates)]
+    quantities = [(i % 7) * 0.125 + 0.1 for i in range(rows + extra_quantities)]
+
+    expected: Dict[str, float] = {}
+    for date_sold, quantity in zip(dates, quantities):
+        expected[date_sold] = expected.get(date_sold, 0.0) + quantity
+
+    result = aggregate_by_date(dates, quantities)
+    assert list(result.items()) == list(expected.items())